@@ -0,0 +1,120 @@
+# =======================
+# benchmark_embeddings.py
+# =======================
+# Compares the ONNX embedding backends against the default PyTorch
+# HuggingFaceEmbeddings: ingestion speed and retrieval quality.
+#
+#   python benchmark_embeddings.py --file sample.pdf --threads 4 --batch-size 32
+#
+# Quality is measured by using the first sentence of every chunk as a query and
+# checking (a) how often each backend retrieves the source chunk in its top-k and
+# (b) how much each ONNX backend's top-k overlaps the PyTorch top-k.
+# Exits with status 1 if an ONNX backend falls below --min-overlap.
+
+import argparse
+import re
+import sys
+import time
+
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from document_loader import load_document_text
+from onnx_embeddings import ONNXEmbeddings, DEFAULT_MODEL
+
+SAMPLE_TEXT = """
+The quarterly report covers revenue, operating costs and hiring for the third quarter.
+Revenue grew twelve percent year over year, driven by the enterprise subscription tier.
+Operating costs rose by five percent because of new data center leases in Frankfurt.
+The engineering team hired fourteen people, mostly in the platform and security groups.
+Customer churn fell to two percent after the onboarding workflow was redesigned.
+The board approved a budget of four million dollars for the document intelligence project.
+Action items: finalise the vendor contract by October, publish the security audit, and
+schedule the migration of the billing system to the new cluster.
+Meeting notes from the product review: the search feature will ship in beta next month,
+and the mobile app redesign is delayed until the accessibility review is complete.
+The proposal recommends consolidating three regional support centers into one hub,
+which is expected to save nine hundred thousand dollars per year.
+Risks include currency fluctuations, supplier delays and a tight labour market for
+machine learning engineers. Mitigations are listed in the appendix.
+"""
+
+
+def load_chunks(file_path=None, chunk_size=1000, chunk_overlap=200):
+    if file_path is None:
+        text = " ".join(SAMPLE_TEXT.split())
+        chunk_size, chunk_overlap = 200, 40
+    else:
+        text = load_document_text(file_path)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return splitter.split_text(text)
+
+
+def make_queries(chunks):
+    # First sentence of each chunk, so the source chunk is the expected hit
+    return [re.split(r"(?<=[.!?])\s", chunk.strip(), maxsplit=1)[0][:200] for chunk in chunks]
+
+
+def top_k(doc_vectors, query_vectors, k):
+    docs = np.asarray(doc_vectors, dtype=np.float32)
+    queries = np.asarray(query_vectors, dtype=np.float32)
+    docs /= np.clip(np.linalg.norm(docs, axis=1, keepdims=True), 1e-12, None)
+    queries /= np.clip(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12, None)
+    return np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+
+
+def run_backend(name, embeddings, chunks, queries, k):
+    embeddings.embed_documents(chunks[:2])  # warm-up
+    start = time.perf_counter()
+    doc_vectors = embeddings.embed_documents(chunks)
+    elapsed = time.perf_counter() - start
+    query_vectors = [embeddings.embed_query(q) for q in queries]
+    hits = top_k(doc_vectors, query_vectors, k)
+    self_hit = float(np.mean([i in row for i, row in enumerate(hits)]))
+    print(f"{name:10s} {len(chunks) / elapsed:8.1f} chunks/s  {elapsed:7.2f}s  self-hit@{k}: {self_hit:.3f}")
+    return np.asarray(doc_vectors), hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ONNX embedding backends against PyTorch")
+    parser.add_argument("--file", help="pdf/docx/pptx to index (default: built-in sample text)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--threads", type=int, default=None, help="ONNX Runtime intra-op threads")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--min-overlap", type=float, default=0.9,
+                        help="minimum mean top-k overlap with the PyTorch backend")
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.file)
+    queries = make_queries(chunks)
+    k = min(args.k, len(chunks))
+    print(f"{len(chunks)} chunks, {len(queries)} queries, k={k}\n")
+
+    backends = {
+        "torch": lambda: HuggingFaceEmbeddings(model_name=args.model),
+        "onnx": lambda: ONNXEmbeddings(args.model, quantize=False, intra_op_threads=args.threads,
+                                       batch_size=args.batch_size),
+        "onnx-int8": lambda: ONNXEmbeddings(args.model, quantize=True, intra_op_threads=args.threads,
+                                            batch_size=args.batch_size),
+    }
+    results = {name: run_backend(name, build(), chunks, queries, k) for name, build in backends.items()}
+
+    print()
+    base_vectors, base_hits = results["torch"]
+    failed = False
+    for name in ("onnx", "onnx-int8"):
+        vectors, hits = results[name]
+        cosine = np.sum(base_vectors * vectors, axis=1) / (
+            np.linalg.norm(base_vectors, axis=1) * np.linalg.norm(vectors, axis=1)
+        )
+        overlap = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(base_hits, hits)]))
+        status = "OK" if overlap >= args.min_overlap else "FAIL"
+        print(f"{name:10s} top-{k} overlap with torch: {overlap:.3f}  mean cosine: {cosine.mean():.4f}  {status}")
+        failed = failed or overlap < args.min_overlap
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
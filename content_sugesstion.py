@@ -1,8 +1,11 @@
 import os
+import re
 import json
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
-from docx import Document
+from structured_output import stream_json
+from document_loader import load_document_text
+from document_profile import get_document_profile, section_headings
 
 # ✅ Load API keys from .env
 import streamlit as st
@@ -11,50 +14,74 @@ GROQ_API_KEY = st.secrets.get("GROQ_API_KEY")
 # ✅ Initialize Groq LLM
 llm = ChatGroq(model="llama3-70b-8192", api_key=GROQ_API_KEY)
 
-def read_docx(file_path):
-    """Extract text from a Word doc."""
-    doc = Document(file_path)
-    text = []
-    for para in doc.paragraphs:
-        if para.text.strip():
-            text.append(para.text.strip())
-    return "\n".join(text)
-
-def analyze_doc_with_llm(doc_text):
-    """Ask LLM to return structured JSON analysis."""
+MAX_SOURCE_BULLETS = 50
+BULLET_PATTERN = re.compile(r"^\s*(?:[-*\u2022\u25aa\u25e6\u2023]|\d+[.)])\s+(.+)$", re.MULTILINE)
+
+def extract_bullets(input_file, doc_text, limit=MAX_SOURCE_BULLETS):
+    """Bullet and numbered-list items from the document, as written."""
+    bullets = []
+    if str(input_file).lower().endswith(".docx"):
+        # Word list markers are not part of the paragraph text
+        from docx import Document
+        for para in Document(input_file).paragraphs:
+            numbered = para._p.pPr is not None and para._p.pPr.numPr is not None
+            if para.text.strip() and (numbered or para.style.name.startswith("List")):
+                bullets.append(para.text.strip())
+    bullets += [b.strip() for b in BULLET_PATTERN.findall(doc_text) if b.strip() not in bullets]
+    return bullets[:limit]
+
+def analyze_doc_with_llm(profile, source_bullets=None, on_item=None):
+    """
+    Ask LLM to return structured JSON analysis, calling on_item(key, value) as each field completes.
+    Works from the shared document profile plus the document's own bullet points,
+    so the full text is not sent again. Drafts for missing sections are based on
+    the outline and key points rather than the full text.
+    """
+    present_sections = section_headings(profile)
+    doc_type = profile["doc_type"]
+    if on_item:
+        on_item("doc_type", doc_type)
+        for section in present_sections:
+            on_item("present_sections", section)
+
     prompt = f"""
     You are an AI document assistant.
-    Analyze the document below and respond in **valid JSON only** with the following keys:
-    - doc_type: (string) type of document (e.g., report, proposal, resume)
+    A {doc_type} document has the outline, key points and original bullet points below.
+    Respond in **valid JSON only** with the following keys:
     - expected_sections: (list of strings) ideal sections for this doc type
-    - present_sections: (list of strings) sections already found
-    - missing_sections: (list of strings) sections not present
-    - expanded_bullets: (list of strings) bullet points rewritten as full paragraphs
-    - drafts_for_missing: (dict) keys = missing section names, values = draft text
+    - missing_sections: (list of strings) expected sections not present in the outline
+    - expanded_bullets: (list of strings) each original bullet point rewritten as a full paragraph
+      (empty list if there are none)
+    - drafts_for_missing: (dict) keys = missing section names, values = draft text consistent with the key points
 
-    Document Content:
-    {doc_text}
+    Document Outline:
+    {json.dumps(profile["sections"], indent=2)}
+
+    Key Points:
+    {json.dumps(profile["key_points"], indent=2)}
+
+    Original Bullet Points:
+    {json.dumps(source_bullets or [], indent=2)}
     """
-    response = llm.invoke(prompt)
-    content = response.content
-
-    # Ensure valid JSON
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        # If model outputs extra text, try to extract JSON only
-        try:
-            json_str = content[content.find("{"):content.rfind("}")+1]
-            return json.loads(json_str)
-        except:
-            return {"error": "Invalid JSON from LLM", "raw_output": content}
-
-def process_document(input_file):
-    # Step 1: Read input
-    doc_text = read_docx(input_file)
+    # Stream and parse field by field; broken fields are retried on their own
+    parser = stream_json(llm, prompt, task="content_suggestion", on_item=on_item)
+    if not parser.result:
+        return {"error": "Invalid JSON from LLM", "raw_output": parser.raw}
+    analysis = {"doc_type": doc_type, "present_sections": present_sections}
+    analysis.update(parser.result)
+    if parser.failed or parser.missing:
+        analysis["unparsed_fields"] = sorted({key for key, _, _ in parser.failed} | set(parser.missing))
+    return analysis
+
+def process_document(input_file, on_item=None):
+    # Step 1: Read input (type and structure from the shared document profile)
+    doc_text = load_document_text(input_file)
+    profile = get_document_profile(doc_text)
+    if not profile["sections"] and not profile["key_points"]:
+        return {"error": "Invalid JSON from LLM", "raw_output": profile["raw"]}
 
     # Step 2: Ask Groq LLM
-    analysis = analyze_doc_with_llm(doc_text)
+    analysis = analyze_doc_with_llm(profile, source_bullets=extract_bullets(input_file, doc_text), on_item=on_item)
 
     # Step 3: Print JSON
     print("\n📄 AI Suggestions (JSON):\n")
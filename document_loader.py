@@ -0,0 +1,30 @@
+# =======================
+# document_loader.py
+# =======================
+# Single loader for uploaded documents. Every pipeline reads text through
+# here, so the same file always yields the same text (and document hash).
+
+from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, UnstructuredPowerPointLoader
+
+
+# data ingestion
+def load_document(file_path):
+    ext = str(file_path).lower()
+    if ext.endswith(".pdf"):
+        loader = PyPDFLoader(str(file_path))
+    elif ext.endswith(".docx"):
+        loader = Docx2txtLoader(str(file_path))
+    elif ext.endswith(".pptx"):
+        loader = UnstructuredPowerPointLoader(str(file_path))
+    else:
+        raise ValueError("Unsupported format")
+
+    docs = loader.load()
+    return docs
+
+
+def load_document_text(file_path) -> str:
+    """
+    Load a pdf/docx/pptx file and return its full text.
+    """
+    return " ".join([doc.page_content for doc in load_document(file_path)])
@@ -0,0 +1,105 @@
+# =======================
+# document_profile.py
+# =======================
+# One LLM pass per document that yields its type, section structure and key
+# points. Formatting, content suggestion and extraction all read from this
+# profile instead of sending the full text to the LLM again.
+
+import hashlib
+import threading
+from collections import OrderedDict
+from langchain_groq import ChatGroq
+from structured_output import stream_json
+
+# Load environment variables
+import streamlit as st
+GROQ_API_KEY = st.secrets.get("GROQ_API_KEY")
+
+# Initialize LLM
+llm = ChatGroq(
+    model="llama3-8b-8192",
+    temperature=0,
+    groq_api_key=GROQ_API_KEY
+)
+
+DOC_TYPES = ["report", "proposal", "resume", "meeting_notes", "other"]
+
+# Profiles are cached by document hash, most recently used last
+MAX_CACHED_PROFILES = 64
+_profile_cache = OrderedDict()
+_profile_lock = threading.Lock()
+
+
+def document_hash(doc_text: str) -> str:
+    return hashlib.sha256(doc_text.encode("utf-8")).hexdigest()
+
+
+# =======================
+# Profile
+# =======================
+def build_document_profile(doc_text: str, on_section=None) -> dict:
+    """
+    Run the single whole-document LLM pass.
+    Returns a dict with 'doc_type', 'sections' (outline), 'key_points', 'raw'
+    (the LLM response) and 'complete', which is False if the response was cut
+    off, any field failed to parse or is missing, or sections or key points are
+    empty. A response without JSON gives an empty, incomplete profile.
+    """
+    prompt = f"""
+    You are an expert document analyst.
+    Read the following document once and return **valid JSON only** with these keys, in this order:
+    - doc_type: one of {DOC_TYPES}
+    - sections: list of sections found in the document, each with 'heading' and 'subheadings';
+      each subheading has 'heading' and 'bullets' (key sentences or takeaways as bullet points)
+    - key_points: list of strings covering key facts (with context), important fields, numbers,
+      names, dates, definitions or rules, main insights, relevant quotes, takeaways and action items.
+      If something is unclear, note it instead of guessing.
+
+    Document Text:
+    \"\"\"{doc_text}\"\"\"
+    """
+
+    def handle(key, value):
+        if key == "sections" and on_section:
+            on_section(value)
+
+    parser = stream_json(llm, prompt, task="profile", on_item=handle)
+    profile = parser.result
+    doc_type = str(profile.get("doc_type", "")).strip().lower()
+    return {
+        "doc_type": doc_type if doc_type in DOC_TYPES else "other",
+        "sections": profile.get("sections", []),
+        "key_points": profile.get("key_points", []),
+        "raw": parser.raw,
+        "complete": parser.complete and bool(profile.get("sections")) and bool(profile.get("key_points")),
+    }
+
+
+def get_document_profile(doc_text: str, on_section=None) -> dict:
+    """
+    Return the cached profile for this document, building it on first use.
+    on_section is replayed from the cache so callers see the same stream of sections.
+    Incomplete profiles are returned but not cached, so the next call retries.
+    """
+    key = document_hash(doc_text)
+    with _profile_lock:
+        profile = _profile_cache.get(key)
+        if profile is not None:
+            _profile_cache.move_to_end(key)
+
+    if profile is None:
+        profile = build_document_profile(doc_text, on_section=on_section)
+        if not profile["complete"]:
+            return profile
+        with _profile_lock:
+            _profile_cache[key] = profile
+            while len(_profile_cache) > MAX_CACHED_PROFILES:
+                _profile_cache.popitem(last=False)
+    elif on_section:
+        for section in profile["sections"]:
+            on_section(section)
+    return profile
+
+
+def section_headings(profile: dict) -> list:
+    return [s.get("heading", "") for s in profile.get("sections", []) if s.get("heading")]
@@ -1,8 +1,7 @@
 import os
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
-import json
-import re
+from structured_output import stream_json
 
 # 1️⃣ Load environment variables
 import streamlit as st
@@ -18,20 +17,6 @@ llm = ChatGroq(
 )
 
 
-# -------------------------------
-# Utility: Extract JSON from LLM response
-# -------------------------------
-def extract_json_from_text(text):
-    try:
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if match:
-            json_str = match.group(0)
-            return json.loads(json_str)
-    except json.JSONDecodeError:
-        pass
-    return None
-
-
 # -------------------------------
 # Extract factual claims from chunk
 # -------------------------------
@@ -48,9 +33,8 @@ Return ONLY JSON:
 Text:
 \"\"\"{chunk}\"\"\"
 """
-    response = llm.invoke(prompt)
-    claim = extract_json_from_text(response.content)
-    return claim
+    parser = stream_json(llm, prompt, task="fact")
+    return parser.result if parser.started else None
 
 
 # -------------------------------
@@ -129,11 +113,11 @@ def finding_mistake(text):
     Text:
     \"\"\"{text}\"\"\"
     """
-    response = llm.invoke(prompt)
-    return extract_json_from_text(response.content)
+    parser = stream_json(llm, prompt, task="grammar")
+    return parser.result if parser.started else None
 
 
-def checking_grammar_chunks(chunks):
+def checking_grammar_chunks(chunks, on_result=None):
     results = []
 
     for i, chunk in enumerate(chunks):
@@ -142,10 +126,13 @@ def checking_grammar_chunks(chunks):
         if result is None:
             result = {"mistake": None, "type": None, "correction": None}
 
-        results.append({
+        entry = {
             "chunk_index": i,
             "text": chunk,
             "result": result
-        })
+        }
+        results.append(entry)
+        if on_result:
+            on_result(entry)
 
     return results
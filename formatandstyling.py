@@ -6,38 +6,27 @@
 from docx import Document
 from docx.shared import Pt, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
-import os
 import json
 from pathlib import Path
 
 # Correct way to create output file path
 
 
-# Load environment variables
-import streamlit as st
-GROQ_API_KEY = st.secrets.get("GROQ_API_KEY")
-
-# Initialize LLM
-llm = ChatGroq(
-    model="llama3-8b-8192",
-    temperature=0,
-    groq_api_key=GROQ_API_KEY
-)
 import json
-import re
+from structured_output import parse_json
+from document_loader import load_document_text
+from document_profile import get_document_profile
 
 def clean_llm_json_output(llm_output: str) -> str:
     """
     Cleans LLM output to extract valid JSON string.
+    Malformed sections are repaired or dropped individually instead of
+    discarding the whole outline.
     """
-    # Remove Markdown code fences if present
-    cleaned = re.sub(r"```(json)?", "", llm_output, flags=re.IGNORECASE)
-    # Remove any leading/trailing text before/after JSON
-    match = re.search(r"\{.*\}", cleaned, flags=re.DOTALL)
-    if match:
-        return match.group()
+    outline = parse_json(llm_output, task="outline")
+    if outline:
+        return json.dumps(outline)
     else:
         # fallback: empty JSON structure
         return '{"sections":[]}'
@@ -83,56 +72,6 @@ TEMPLATES = {
     }
 }
 
-# =======================
-# LLM Functions
-# =======================
-def detect_document_type(doc_text: str) -> str:
-    """
-    Detect document type using LLM.
-    """
-    prompt = f"""
-    You are an expert document classifier.
-    Classify the following document into one of: 'report', 'proposal', 'resume', 'meeting_notes', 'other'.
-    Document Text:
-    \"\"\"{doc_text}\"\"\"
-    """
-    response = llm.invoke(prompt)
-    return response.content.strip() if hasattr(response, "content") else response.strip()
-
-def generate_document_outline(doc_text: str) -> str:
-    """
-    Generate structured outline from text using LLM.
-    Output is a JSON string with sections, subheadings, and paragraphs or sentences and if there are any key points or takeways write them in bullet points.
-    """
-    prompt = f"""
-    You are an expert document designer.
-    Analyze the following text and generate a structured outline in JSON format:
-    - sections: list of sections
-    - each section has 'heading', 'subheadings', each with 'heading' paragraph ,sentence and 'bullets'
-
-    Document Text:
-    \"\"\"{doc_text}\"\"\"
-    Only return **valid JSON**, no extra text.
-    """
-    response = llm.invoke(prompt)
-    print(response.content)
-    return response.content if hasattr(response, "content") else response
-
-# =======================
-# Document Loader
-# =======================
-def load_document(file_path: str):
-    ext = os.path.splitext(file_path)[1].lower()
-    if ext == ".docx":
-        from langchain_community.document_loaders import Docx2txtLoader
-        loader = Docx2txtLoader(file_path)
-    elif ext == ".pdf":
-        from langchain_community.document_loaders import PyPDFLoader
-        loader = PyPDFLoader(file_path)
-    else:
-        raise ValueError("Unsupported format for this demo")
-    return loader.load()
-
 # =======================
 # Rendering Functions
 # =======================
@@ -182,20 +121,18 @@ def render_outline_to_docx(outline_json: str, template_config: dict, output_file
 # =======================
 # Main Pipeline
 # =======================
-def formatting_pipeline(file_path: str) -> str:
+def formatting_pipeline(file_path: str, on_section=None, output_file=None) -> str:
     # Load document and extract text
-    docs = load_document(file_path)
-    full_text = " ".join([doc.page_content for doc in docs])
-
-    # Detect document type
-    doc_type = detect_document_type(full_text)
-    template_config = TEMPLATES.get(doc_type, TEMPLATES["report"])
+    full_text = load_document_text(file_path)
 
-    # Generate outline
-    outline = generate_document_outline(full_text)
+    # Document type and outline come from the shared document profile
+    profile = get_document_profile(full_text, on_section=on_section)
+    template_config = TEMPLATES.get(profile["doc_type"], TEMPLATES["report"])
+    outline = json.dumps({"sections": profile["sections"]})
 
     # Render formatted Word doc
-    output_file = file_path.with_name(file_path.stem + "_formatted.docx")
+    if output_file is None:
+        output_file = file_path.with_name(file_path.stem + "_formatted.docx")
     render_outline_to_docx(outline, template_config, output_file)
     return output_file
 
@@ -0,0 +1,154 @@
+# =======================
+# onnx_embeddings.py
+# =======================
+# CPU embedding backend that runs the sentence-transformers model through
+# ONNX Runtime, optionally with int8 dynamic quantization. Produces the same
+# mean-pooled, L2-normalised vectors as HuggingFaceEmbeddings so indexes stay
+# compatible.
+
+import inspect
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_CACHE_DIR = Path("onnx_models")
+# Bump when the export changes so stale cached models are not reused
+EXPORT_VERSION = 2
+
+
+def _write_atomic(final_path: Path, write) -> None:
+    """
+    Call write(tmp_path) on a unique temp file next to final_path, then move it
+    into place, so concurrent exporters never load a half-written model.
+    """
+    with tempfile.NamedTemporaryFile(dir=final_path.parent, suffix=".onnx.part", delete=False) as f:
+        tmp_path = Path(f.name)
+    try:
+        write(tmp_path)
+        tmp_path.replace(final_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def export_onnx_model(model_name: str = DEFAULT_MODEL, cache_dir: Path = ONNX_CACHE_DIR, quantize: bool = False) -> Path:
+    """
+    Export the transformer to ONNX once (and int8-quantize it if asked).
+    Returns the path of the model file to load; later calls reuse the cached file.
+    """
+    model_dir = Path(cache_dir) / model_name.replace("/", "__")
+    onnx_path = model_dir / f"model.v{EXPORT_VERSION}.onnx"
+
+    if not onnx_path.exists():
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        model_dir.mkdir(parents=True, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name)
+        model.eval()
+
+        class ByName(torch.nn.Module):
+            # torch.onnx.export binds inputs by position; pass them to the model by name
+            def __init__(self, model, names):
+                super().__init__()
+                self.model = model
+                self.names = names
+
+            def forward(self, *inputs):
+                return self.model(**dict(zip(self.names, inputs))).last_hidden_state
+
+        dummy = tokenizer(["DocuMate export"], return_tensors="pt")
+        input_names = list(dummy.keys())
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        # Newer torch defaults to the dynamo exporter, which ignores dynamic_axes
+        legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+
+        def export(path):
+            with torch.no_grad():
+                torch.onnx.export(
+                    ByName(model, input_names),
+                    tuple(dummy[name] for name in input_names),
+                    str(path),
+                    input_names=input_names,
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=14,
+                    **legacy,
+                )
+
+        _write_atomic(onnx_path, export)
+
+    if not quantize:
+        return onnx_path
+
+    int8_path = model_dir / f"model.v{EXPORT_VERSION}.int8.onnx"
+    if not int8_path.exists():
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        _write_atomic(int8_path, lambda path: quantize_dynamic(str(onnx_path), str(path), weight_type=QuantType.QInt8))
+    return int8_path
+
+
+class ONNXEmbeddings(Embeddings):
+    """
+    LangChain embeddings backed by an ONNX Runtime CPU session.
+
+    intra_op_threads controls ONNX Runtime's per-operator thread pool
+    (None lets it pick one thread per physical core); batch_size is the
+    number of texts encoded per session run.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, quantize: bool = False, intra_op_threads: int = None,
+                 batch_size: int = 32, max_length: int = 256, cache_dir: Path = ONNX_CACHE_DIR):
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The ONNX embedding backend needs onnxruntime and transformers: pip install onnxruntime transformers"
+            ) from e
+
+        self.model_name = model_name
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        model_path = export_onnx_model(model_name, cache_dir, quantize)
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: list) -> np.ndarray:
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+        feeds = {name: encoded[name].astype(np.int64) for name in self._input_names if name in encoded}
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalisation (as in the sentence-transformers model)
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: list) -> list:
+        texts = [t.replace("\n", " ") for t in texts]
+        # Batch texts of similar length together to minimise padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._encode_batch([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
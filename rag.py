@@ -1,4 +1,3 @@
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, UnstructuredPowerPointLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
@@ -7,6 +6,8 @@ from langchain.chains import RetrievalQA
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 import os
+from document_loader import load_document, load_document_text
+from document_profile import get_document_profile
 
 #loading llm env groq
 import streamlit as st
@@ -20,27 +21,29 @@ llm = ChatGroq(
 )
 
 import streamlit as st
+# embedding backend: "torch" (default), "onnx" or "onnx-int8"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = st.secrets.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(st.secrets.get("EMBEDDING_THREADS", 0)) or None
+EMBEDDING_BATCH_SIZE = int(st.secrets.get("EMBEDDING_BATCH_SIZE", 32))
+
 @st.cache_resource
 def get_embeddings():
+    if EMBEDDING_BACKEND in ("onnx", "onnx-int8"):
+        from onnx_embeddings import ONNXEmbeddings
+        return ONNXEmbeddings(
+            model_name=EMBEDDING_MODEL,
+            quantize=EMBEDDING_BACKEND == "onnx-int8",
+            intra_op_threads=EMBEDDING_THREADS,
+            batch_size=EMBEDDING_BATCH_SIZE
+        )
+    elif EMBEDDING_BACKEND != "torch":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
     return HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
+        model_name=EMBEDDING_MODEL
     )
 
 
-# data ingestion 
-def load_document(file_path):
-    if str(file_path).endswith(".pdf"):
-        loader = PyPDFLoader(file_path)
-    elif str(file_path).endswith(".docx"):
-        loader = Docx2txtLoader(file_path)
-    elif str(file_path).endswith(".pptx"):
-        loader = UnstructuredPowerPointLoader(file_path)
-    else:
-        raise ValueError("Unsupported format")
-    
-    docs = loader.load()
-    return docs
-
 # text splitting
 def split_docs(docs, chunk_size=1000, chunk_overlap=200):
     splitter = RecursiveCharacterTextSplitter(
@@ -52,9 +55,14 @@ def split_docs(docs, chunk_size=1000, chunk_overlap=200):
 #embedding model
 embedding_model = get_embeddings()
 #making of indexing vector store 
-def build_qa(docs):
+def build_vectorstore(docs):
     # Create embeddings + vector store
-    vectorstore = FAISS.from_documents(docs, embedding_model)
+    return FAISS.from_documents(docs, embedding_model)
+
+def build_qa(docs=None, vectorstore=None):
+    # Reuse a shared vector store when given, otherwise index the docs
+    if vectorstore is None:
+        vectorstore = build_vectorstore(docs)
     retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
 
     # QA chain
@@ -70,41 +78,6 @@ def build_qa(docs):
 def build_summarization_chain():
     return load_summarize_chain(llm, chain_type="map_reduce")
 
-#function for extracting import information from docs
-
-def extract_facts_and_points(doc_text: str) -> str:
-    """
-    Extracts key facts, important fields, and critical insights from any document (pdf, doc, ppt, notes, etc.).
-    """
-    
-    prompt = f"""
-    You are an expert information extractor.  
-    Your task is to carefully read the following document text and extract:
-    - Key facts (with context)
-    - Important fields, numbers, names, dates, definitions, or rules
-    - Main points and insights
-    - Relevant quotes or excerpts
-    - Key takeaways
-    - if any fact and figure are available in doc do return this also with context and fields
-    - Action items (if any)
-    
-    The document may be:
-    - A project repo or technical document
-    - SOP or policy
-    - Notes or a knowledge document
-    - A presentation (PPT converted text)
-    - Or any other kind of unstructured content
-    
-    Document Text:
-    \"\"\"{doc_text}\"\"\"
-
-    Now provide the extracted information in a **clear bullet point list**. 
-    If something is unclear, make a note of it instead of guessing.
-    """
-
-    response = llm.invoke(prompt)
-    return response.content if hasattr(response, "content") else response
-
 def qa_with_docs(file_path: str):
     # Load document
     docs = load_document(file_path)
@@ -136,10 +109,14 @@ def process_file_summarization(file_path):
 
 def process_file_extraction(file_path):
     # Load + split
-    docs = load_document(file_path)
-    # Fact extraction
-    full_text = " ".join([doc.page_content for doc in docs])
-    extracted_info = extract_facts_and_points(full_text)
+    # Fact extraction from the shared document profile
+    full_text = load_document_text(file_path)
+    profile = get_document_profile(full_text)
+    if profile["key_points"]:
+        extracted_info = "\n".join(f"- {point}" for point in profile["key_points"])
+    else:
+        # No structured key points: fall back to the raw LLM answer
+        extracted_info = profile["raw"]
     print(f"Extracted Information:\n{extracted_info}")
     return {
         "facts": extracted_info
@@ -0,0 +1,274 @@
+# =======================
+# resource_manager.py
+# =======================
+# Keeps memory and disk bounded when many users share one Streamlit process:
+# - uploads are stored once per content hash and old temp files are collected
+# - FAISS indexes are shared across sessions through a size-bounded LRU
+# - per-session and per-index memory use is tracked for reporting
+
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import streamlit as st
+
+TEMP_DIR = Path("temp")
+TEMP_MAX_AGE_SECONDS = int(st.secrets.get("TEMP_MAX_AGE_SECONDS", 6 * 3600))
+TEMP_MAX_MB = int(st.secrets.get("TEMP_MAX_MB", 1024))
+INDEX_CACHE_MAX_MB = int(st.secrets.get("INDEX_CACHE_MAX_MB", 512))
+INDEX_CACHE_MAX_ENTRIES = int(st.secrets.get("INDEX_CACHE_MAX_ENTRIES", 32))
+MAX_CHAT_MESSAGES = int(st.secrets.get("MAX_CHAT_MESSAGES", 100))
+SESSION_TTL_SECONDS = 3600
+
+MB = 1024 * 1024
+
+
+# =======================
+# Uploads & Temp Files
+# =======================
+# Upload held by each live session: session_id -> (file_path, last_seen)
+_held_uploads = {}
+_held_lock = threading.Lock()
+
+
+def store_upload(uploaded_file, temp_dir: Path = TEMP_DIR, session_id: str = None):
+    """
+    Write an uploaded file to temp_dir once per content hash.
+    Returns (file_path, doc_hash). Reruns and other sessions uploading the same
+    bytes reuse the existing file, and a file removed since the last rerun is
+    written again. With session_id, the file is held for that session so
+    garbage collection leaves it alone while the session is live.
+    """
+    data = uploaded_file.getbuffer()
+    doc_hash = hashlib.sha256(data).hexdigest()
+    temp_dir.mkdir(exist_ok=True)
+
+    file_path = temp_dir / f"{doc_hash}{Path(uploaded_file.name).suffix.lower()}"
+    if session_id:
+        # Hold before writing so a concurrent collection cannot remove it
+        with _held_lock:
+            _held_uploads[session_id] = (file_path.resolve(), time.time())
+    if not file_path.exists():
+        # Unique temp name per writer; concurrent writers of the same bytes
+        # each replace the target atomically with identical content.
+        with tempfile.NamedTemporaryFile(dir=temp_dir, suffix=".part", delete=False) as f:
+            f.write(data)
+        Path(f.name).replace(file_path)
+    else:
+        # Mark as recently used so garbage collection keeps it
+        file_path.touch()
+
+    collect_temp_files(temp_dir)
+    return file_path, doc_hash
+
+
+def held_uploads(ttl_seconds: int = SESSION_TTL_SECONDS) -> set:
+    """
+    Paths of uploads held by sessions seen within ttl_seconds.
+    """
+    now = time.time()
+    with _held_lock:
+        for sid in [s for s, (_, seen) in _held_uploads.items() if now - seen > ttl_seconds]:
+            del _held_uploads[sid]
+        return {path for path, _ in _held_uploads.values()}
+
+
+def session_output_path(file_path: Path, session_id: str, suffix: str) -> Path:
+    """
+    Per-session name for a file derived from a shared upload, so sessions
+    working on the same document never overwrite each other's output.
+    """
+    return file_path.with_name(f"{file_path.stem}_{session_id}{suffix}")
+
+
+_last_collect = 0.0
+_collect_lock = threading.Lock()
+
+
+def collect_temp_files(temp_dir: Path = TEMP_DIR, max_age_seconds: int = TEMP_MAX_AGE_SECONDS,
+                       max_bytes: int = TEMP_MAX_MB * MB, min_interval: int = 60) -> int:
+    """
+    Delete temp files older than max_age_seconds, then the least recently used
+    ones until the directory is below max_bytes. Uploads held by live sessions
+    are never removed. Runs at most once per min_interval seconds per process.
+    Returns the number of files removed.
+    """
+    global _last_collect
+    now = time.time()
+    with _collect_lock:
+        if now - _last_collect < min_interval:
+            return 0
+        _last_collect = now
+
+    held = held_uploads()
+    files = []
+    for path in temp_dir.glob("*"):
+        if path.resolve() in held:
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if path.is_file():
+            files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+
+    removed = 0
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        if now - mtime < max_age_seconds and total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+# =======================
+# Memory Estimates
+# =======================
+def deep_sizeof(obj, seen=None) -> int:
+    """
+    Approximate size in bytes of plain python data (dicts, lists, strings).
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def vectorstore_sizeof(vectorstore) -> int:
+    """
+    Approximate memory of a FAISS vector store: float32 vectors plus stored texts.
+    """
+    index = getattr(vectorstore, "index", None)
+    size = index.ntotal * index.d * 4 if index is not None else 0
+    docstore = getattr(getattr(vectorstore, "docstore", None), "_dict", {})
+    size += sum(sys.getsizeof(doc.page_content) for doc in docstore.values())
+    return size
+
+
+def process_memory() -> int:
+    """
+    Resident memory of this process in bytes (peak RSS where /proc is unavailable).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+# =======================
+# Shared Index Cache
+# =======================
+class IndexCache:
+    """
+    Process-wide LRU of vector stores keyed by document hash, bounded by both
+    entry count and estimated memory.
+    """
+
+    def __init__(self, max_bytes: int = INDEX_CACHE_MAX_MB * MB, max_entries: int = INDEX_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def get_or_build(self, key, build):
+        vectorstore = self.get(key)
+        if vectorstore is not None:
+            return vectorstore
+
+        # Build outside the lock so other sessions are not blocked
+        vectorstore = build()
+        with self._lock:
+            self._entries[key] = (vectorstore, vectorstore_sizeof(vectorstore))
+            self._entries.move_to_end(key)
+            self._evict()
+        return vectorstore
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the limit
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.total_bytes() > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size in self._entries.values())
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {key: size for key, (_, size) in self._entries.items()}
+
+
+# =======================
+# Sessions
+# =======================
+class SessionRegistry:
+    """
+    Last known memory footprint of each live session's state.
+    """
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def record(self, session_id: str, session_state) -> int:
+        state = {k: v for k, v in session_state.items() if isinstance(v, (str, int, float, list, dict, tuple))}
+        size = deep_sizeof(state)
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (size, now)
+            for sid in [s for s, (_, seen) in self._sessions.items() if now - seen > self.ttl_seconds]:
+                del self._sessions[sid]
+        return size
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {sid: size for sid, (size, _) in self._sessions.items()}
+
+
+def trim_chat_history(history: list, max_messages: int = MAX_CHAT_MESSAGES) -> list:
+    """
+    Drop the oldest messages so a session's chat history stays bounded.
+    """
+    if len(history) > max_messages:
+        del history[:len(history) - max_messages]
+    return history
+
+
+@st.cache_resource
+def get_index_cache() -> IndexCache:
+    return IndexCache()
+
+
+@st.cache_resource
+def get_session_registry() -> SessionRegistry:
+    return SessionRegistry()
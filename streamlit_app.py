@@ -1,44 +1,49 @@
 import streamlit as st
-from pathlib import Path
 import os
 import html
 
 # Import backend functions
-from rag import load_document, split_docs, process_file_summarization, process_file_extraction, build_qa
+from rag import load_document, split_docs, process_file_summarization, process_file_extraction, build_qa, build_vectorstore
 from formatandstyling import formatting_pipeline
 from content_sugesstion import process_document
 from fact_pipeline import fact_check_claims, extract_facts_from_chunks, checking_grammar_chunks
+from resource_manager import (
+    store_upload, session_output_path, get_index_cache, get_session_registry, trim_chat_history, process_memory, MB
+)
 
 st.set_page_config(page_title="DocuMate", layout="wide")
 st.title("📄 DocuMate - Your Document Assistant")
 
 # Upload file
 import uuid
-from pathlib import Path
 
 uploaded_file = st.file_uploader("Upload document", type=["pdf", "docx", "pptx"])
 
-if uploaded_file:
-    temp_dir = Path("temp")
-    temp_dir.mkdir(exist_ok=True)
-
-    file_path = temp_dir / f"{uuid.uuid4()}_{uploaded_file.name}"
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
 
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+if uploaded_file:
+    # Stored once per content hash and held for this session; old temp files are
+    # garbage-collected. A file removed since the last rerun is written again here.
+    file_path, doc_hash = store_upload(uploaded_file, session_id=st.session_state.session_id)
 
     st.success(f"Uploaded {uploaded_file.name} successfully!")
 
     # -------------------
-    # Build QA chain once
+    # Shared vector index
     # -------------------
-    if "qa_chain" not in st.session_state:
-        docs = load_document(file_path)
-        split_documents = split_docs(docs)
-        qa_chain = build_qa(split_documents)
-        st.session_state.qa_chain = qa_chain
+    # Indexes live in a process-wide LRU keyed by document hash, so sessions
+    # with the same document share one index and old ones are evicted.
+    index_cache = get_index_cache()
+    if index_cache.get(doc_hash) is None:
+        with st.spinner("Indexing document..."):
+            index_cache.get_or_build(doc_hash, lambda: build_vectorstore(split_docs(load_document(file_path))))
         st.success("QA chain is ready!")
 
+    if st.session_state.get("doc_hash") != doc_hash:
+        st.session_state.doc_hash = doc_hash
+        st.session_state.chat_history = []
+
     # Tabs for all features
     tabs = st.tabs([
         "QA with Docs",
@@ -112,9 +117,13 @@ if uploaded_file:
         # Chat input
         user_input = st.text_input("Type your question here:", key="chat_input")
         if st.button("Send") and user_input:
-            answer = st.session_state.qa_chain.run(user_input)
+            vectorstore = index_cache.get_or_build(
+                doc_hash, lambda: build_vectorstore(split_docs(load_document(file_path)))
+            )
+            answer = build_qa(vectorstore=vectorstore).run(user_input)
             st.session_state.chat_history.append({"role": "user", "content": user_input})
             st.session_state.chat_history.append({"role": "ai", "content": answer})
+            trim_chat_history(st.session_state.chat_history)
             render_chat()
 
     # ------------------- Summarization -------------------
@@ -135,11 +144,18 @@ if uploaded_file:
     with tabs[3]:
         st.subheader("Apply Formatting & Template")
         if st.button("Format Document"):
-            formatted_file = formatting_pipeline(file_path)
+            outline_preview = st.container()
+            formatted_file = formatting_pipeline(
+                file_path,
+                on_section=lambda section: outline_preview.markdown(f"**{section.get('heading', '')}**"),
+                output_file=session_output_path(file_path, st.session_state.session_id, "_formatted.docx")
+            )
+            formatted_bytes = formatted_file.read_bytes()
+            formatted_file.unlink(missing_ok=True)
             st.success("Document formatted!")
             st.download_button(
                 "Download Formatted Document",
-                formatted_file.read_bytes(),
+                formatted_bytes,
                 file_name=f"formatted_{uploaded_file.name}"
             )
 
@@ -149,8 +165,13 @@ if uploaded_file:
         if st.button("Check Spelling & Grammar"):
             docs = load_document(file_path)
             chunks = split_docs(docs)
-            grammar_corrections = checking_grammar_chunks(chunks)
-            st.write(grammar_corrections)
+            findings = st.container()
+            grammar_corrections = checking_grammar_chunks(
+                chunks,
+                on_result=lambda entry: findings.write(entry["result"]) if entry["result"].get("mistake") else None
+            )
+            with st.expander("All chunks"):
+                st.write(grammar_corrections)
 
     # ------------------- Fact Check -------------------
     with tabs[5]:
@@ -166,5 +187,21 @@ if uploaded_file:
     with tabs[6]:
         st.subheader("Content Recommendation / Suggestion")
         if st.button("Get Suggestions"):
-            suggestions = process_document(file_path)
+            partial = st.container()
+            suggestions = process_document(
+                file_path,
+                on_item=lambda key, value: partial.write({key: value})
+            )
             st.write(suggestions)
+
+# ------------------- Resource usage -------------------
+with st.sidebar.expander("Memory usage"):
+    session_sizes = get_session_registry().usage()
+    session_sizes[st.session_state.session_id] = get_session_registry().record(
+        st.session_state.session_id, st.session_state
+    )
+    index_sizes = get_index_cache().usage()
+    st.write(f"Process: {process_memory() / MB:.1f} MB")
+    st.write(f"This session: {session_sizes[st.session_state.session_id] / MB:.2f} MB")
+    st.write({"sessions (MB)": {sid[:8]: round(size / MB, 2) for sid, size in session_sizes.items()},
+              "indexes (MB)": {key[:12]: round(size / MB, 2) for key, size in index_sizes.items()}})
@@ -0,0 +1,427 @@
+# =======================
+# structured_output.py
+# =======================
+# Shared streaming parser for JSON returned by the LLM.
+# Tokens are fed in as they arrive; every complete root-level field and every
+# complete element of a root-level list is parsed, validated against the task
+# schema and handed to the caller immediately. Broken fragments are repaired
+# locally or re-asked individually instead of discarding the whole answer.
+
+import json
+import re
+
+NoneType = type(None)
+
+# =======================
+# Per-task Schemas
+# =======================
+# A schema is a python type (or tuple of types), a one-element list describing
+# list items, or a dict of required keys. Keys not listed are accepted as-is.
+SCHEMAS = {
+    "outline": {
+        "sections": [{"heading": str}],
+    },
+    "fact": {
+        "fact": (str, NoneType),
+    },
+    "grammar": {
+        "mistake": (str, NoneType),
+        "type": (str, NoneType),
+        "correction": (str, NoneType),
+    },
+    "profile": {
+        "doc_type": str,
+        "sections": [{"heading": str}],
+        "key_points": [str],
+    },
+    "content_suggestion": {
+        "expected_sections": [str],
+        "missing_sections": [str],
+        "expanded_bullets": [str],
+        "drafts_for_missing": dict,
+    },
+}
+
+
+def validate(value, schema) -> bool:
+    """
+    Check a parsed value against a schema from SCHEMAS.
+    """
+    if schema is None:
+        return True
+    if isinstance(schema, list):
+        return isinstance(value, list) and all(validate(v, schema[0]) for v in value)
+    if isinstance(schema, dict):
+        return isinstance(value, dict) and all(
+            key in value and validate(value[key], sub) for key, sub in schema.items()
+        )
+    return isinstance(value, schema)
+
+
+CLOSERS = {"{": "}", "[": "]"}
+OPENERS = {"}": "{", "]": "["}
+
+
+def repair_json_fragment(fragment: str):
+    """
+    Best-effort local repair of a JSON fragment: strips code fences and trailing
+    commas, closes an unterminated string and any open brackets, inserts closers
+    missing before a mismatched bracket and drops stray closers.
+    Raises json.JSONDecodeError if the fragment still cannot be parsed.
+    """
+    text = re.sub(r"```(json)?", "", fragment, flags=re.IGNORECASE).strip()
+
+    out = []
+    stack = []
+    in_string = False
+    escape = False
+    for c in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append(c)
+        elif c in "}]":
+            if OPENERS[c] not in stack:
+                continue
+            while stack[-1] != OPENERS[c]:
+                out.append(CLOSERS[stack.pop()])
+            stack.pop()
+        out.append(c)
+
+    text = "".join(out)
+    if in_string:
+        text += '"'
+    text = re.sub(r"[,:]\s*$", "", text)
+    text += "".join(CLOSERS[b] for b in reversed(stack))
+    text = re.sub(r",\s*([}\]])", r"\1", text)
+    return json.loads(text)
+
+
+# =======================
+# Streaming Parser
+# =======================
+class StreamingJSONParser:
+    """
+    Incremental parser for a single JSON object embedded in LLM output.
+
+    feed() returns the events completed by the new text as
+    ("field", key, value) for root-level values and ("item", key, value) for
+    elements of root-level lists. Parsed values are collected in `result`;
+    fragments that fail to parse or validate are kept in `failed` as
+    (key, index, raw_fragment), where index is the element's position in its
+    list (None for fields), so they can be retried on their own.
+    After close(), `truncated` is True if the root object never closed (the
+    cut-off last value, if repaired, is kept in `cut_off` as
+    (key, index, raw_fragment)), and `missing` lists schema keys absent
+    from the result.
+    """
+
+    def __init__(self, schema=None):
+        self.schema = schema or {}
+        self.result = {}
+        self.failed = []
+        self.missing = []
+        self.truncated = False
+        self.cut_off = None
+        self.started = False
+        self.done = False
+        self._item_count = {}
+        self._buf = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expect = "key"
+        self._key = None
+        self._start = None
+        self._track_depth = None
+
+    @property
+    def raw(self) -> str:
+        return self._buf
+
+    @property
+    def complete(self) -> bool:
+        """
+        True once the root object closed and every schema key parsed and validated.
+        """
+        return self.started and self.done and not self.truncated and not self.failed and not self.missing
+
+    def feed(self, text: str) -> list:
+        self._buf += text
+        events = []
+        while self._pos < len(self._buf) and not self.done:
+            self._step(self._buf[self._pos], self._pos, events)
+            self._pos += 1
+        return events
+
+    def close(self) -> list:
+        """
+        Finish parsing. A value cut off by a truncated response is repaired
+        and emitted if possible, and recorded in `cut_off` so it can be retried.
+        """
+        events = []
+        if self.started and not self.done:
+            self.truncated = True
+            if self._start is not None:
+                key, index = self._key, self._next_index()
+                fragment = self._buf[self._start:].strip()
+                self._finish(len(self._buf), events)
+                if events:
+                    self.cut_off = (key, index, fragment)
+        self.done = True
+        failed_keys = {key for key, _, _ in self.failed}
+        self.missing = [key for key in self.schema if key not in self.result and key not in failed_keys]
+        return events
+
+    # -----------------------
+    # Scanner
+    # -----------------------
+    def _step(self, c, i, events):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                if self._start == self._string_start:
+                    self._finish(i + 1, events)
+                elif self._start is None and len(self._stack) == 1:
+                    self._key = json.loads(self._buf[self._string_start:i + 1])
+            return
+
+        if not self._stack:
+            if c == "{":
+                self._stack.append(c)
+                self.started = True
+            return
+
+        depth = len(self._stack)
+        tracking = self._start is not None
+
+        if c == '"':
+            self._in_string = True
+            self._string_start = i
+            if not tracking and self._at_value_position(depth):
+                self._begin(i, depth)
+            return
+
+        if c in "{[":
+            if not tracking and depth == 1 and self._expect == "value" and c == "[":
+                # Root-level list: its elements are emitted one by one.
+                self._stack.append(c)
+                self.result[self._key] = []
+                self._expect = "after"
+                return
+            if not tracking and self._at_value_position(depth):
+                self._begin(i, depth)
+            self._stack.append(c)
+            return
+
+        if c in "}]":
+            opener = OPENERS[c]
+            if opener not in self._stack:
+                # Stray closer: ignore it rather than unbalancing the stack
+                return
+            # A mismatched closer implicitly closes the containers above its opener
+            new_depth = len(self._stack) - 1 - self._stack[::-1].index(opener)
+            if tracking:
+                if new_depth == self._track_depth and depth > self._track_depth:
+                    # The tracked container itself is closed.
+                    self._finish(i + 1, events)
+                elif new_depth <= self._track_depth:
+                    # Closing the parent ends a bare scalar or a cut-off container.
+                    self._finish(i, events)
+            del self._stack[new_depth:]
+            if not self._stack:
+                self.done = True
+            return
+
+        if c == "," and tracking and depth == self._track_depth:
+            self._finish(i, events)
+            if depth == 1:
+                self._expect = "key"
+            return
+
+        if depth == 1 and not tracking:
+            if c == ":":
+                self._expect = "value"
+            elif c == ",":
+                self._expect = "key"
+            elif not c.isspace() and self._expect == "value":
+                self._begin(i, depth)
+            return
+
+        if not tracking and not c.isspace() and c != "," and self._at_value_position(depth):
+            self._begin(i, depth)
+
+    def _at_value_position(self, depth) -> bool:
+        if depth == 1:
+            return self._expect == "value"
+        return depth == 2 and self._stack[1] == "["
+
+    def _next_index(self):
+        # Position the current list element will take among all elements of its list
+        return self._item_count.get(self._key, 0) if self._track_depth == 2 else None
+
+    def _begin(self, i, depth):
+        self._start = i
+        self._track_depth = depth
+
+    def _finish(self, end, events):
+        fragment = self._buf[self._start:end].strip()
+        kind = "field" if self._track_depth == 1 else "item"
+        self._start = None
+        self._track_depth = None
+        if kind == "field":
+            self._expect = "after"
+        if fragment:
+            index = None
+            if kind == "item":
+                index = self._item_count.get(self._key, 0)
+                self._item_count[self._key] = index + 1
+            self._emit(kind, self._key, index, fragment, events)
+
+    def _emit(self, kind, key, index, fragment, events):
+        schema = self.schema.get(key)
+        if kind == "item" and isinstance(schema, list):
+            schema = schema[0]
+        try:
+            value = json.loads(fragment)
+        except json.JSONDecodeError:
+            try:
+                value = repair_json_fragment(fragment)
+            except json.JSONDecodeError:
+                self.failed.append((key, index, fragment))
+                return
+        if not validate(value, schema):
+            self.failed.append((key, index, fragment))
+            return
+        self.add(kind, key, value)
+        events.append((kind, key, value))
+
+    def add(self, kind, key, value, position=None):
+        if kind != "item":
+            self.result[key] = value
+        elif position is None:
+            self.result.setdefault(key, []).append(value)
+        else:
+            self.result.setdefault(key, []).insert(position, value)
+
+
+# =======================
+# Helpers
+# =======================
+def parse_json(text: str, task: str = None):
+    """
+    Parse a complete LLM response. Returns the JSON object as a dict, or None
+    if the response contains no JSON object at all.
+    """
+    parser = StreamingJSONParser(SCHEMAS.get(task))
+    parser.feed(text)
+    parser.close()
+    return parser.result if parser.started else None
+
+
+def retry_fragment(llm, key, fragment, schema=None):
+    """
+    Ask the LLM to fix a single malformed fragment instead of regenerating the
+    whole answer. Returns the parsed value or None.
+    """
+    prompt = f"""
+    The following JSON value for the field '{key}' is malformed or incomplete.
+    Return ONLY the corrected JSON value, no extra text.
+
+    Fragment:
+    {fragment}
+    """
+    response = llm.invoke(prompt)
+    content = response.content if hasattr(response, "content") else response
+    try:
+        value = repair_json_fragment(content)
+    except json.JSONDecodeError:
+        return None
+    return value if validate(value, schema) else None
+
+
+def retry_missing(llm, prompt, keys, schema=None) -> dict:
+    """
+    Ask the LLM again for only the keys missing from its first answer.
+    Returns the valid fields it produced.
+    """
+    retry_prompt = f"""{prompt}
+    Return ONLY a JSON object with these keys: {keys}
+    """
+    response = llm.invoke(retry_prompt)
+    content = response.content if hasattr(response, "content") else response
+    parser = StreamingJSONParser({key: (schema or {}).get(key) for key in keys})
+    parser.feed(content)
+    parser.close()
+    return {key: parser.result[key] for key in keys if key in parser.result and not parser.truncated}
+
+
+def stream_json(llm, prompt: str, task: str = None, on_item=None) -> StreamingJSONParser:
+    """
+    Stream the LLM response for `prompt` through a StreamingJSONParser.
+    on_item(key, value) is called for every completed root-level field or list
+    element as soon as it arrives. Failed fragments and a cut-off last value are
+    retried once each, fixed list elements keep their original position, and
+    missing schema keys are asked for once. Whatever is still broken stays in
+    `failed` / `missing`.
+    """
+    schema = SCHEMAS.get(task) or {}
+    parser = StreamingJSONParser(schema)
+
+    def dispatch(events):
+        if on_item:
+            for _, key, value in events:
+                on_item(key, value)
+
+    def item_schema(key):
+        sub = schema.get(key)
+        return sub[0] if isinstance(sub, list) else None
+
+    for chunk in llm.stream(prompt):
+        dispatch(parser.feed(chunk.content if hasattr(chunk, "content") else chunk))
+    dispatch(parser.close())
+
+    if parser.cut_off:
+        key, index, fragment = parser.cut_off
+        value = retry_fragment(llm, key, fragment, item_schema(key) if index is not None else schema.get(key))
+        if value is not None:
+            if index is None:
+                parser.result[key] = value
+            else:
+                parser.result[key][-1] = value
+            dispatch([("item" if index is not None else "field", key, value)])
+
+    failed, parser.failed = parser.failed, []
+    lost = {}
+    for key, index, fragment in sorted(failed, key=lambda f: (f[0], -1 if f[1] is None else f[1])):
+        kind = "field" if index is None else "item"
+        value = retry_fragment(llm, key, fragment, schema.get(key) if index is None else item_schema(key))
+        if value is None:
+            parser.failed.append((key, index, fragment))
+            lost[key] = lost.get(key, 0) + 1
+            continue
+        # Earlier elements that could not be fixed are absent, so shift left by that many
+        position = None if index is None else index - lost.get(key, 0)
+        parser.add(kind, key, value, position)
+        dispatch([(kind, key, value)])
+
+    if parser.missing:
+        found = retry_missing(llm, prompt, parser.missing, schema)
+        for key, value in found.items():
+            parser.result[key] = value
+            dispatch([("field", key, value)])
+        parser.missing = [key for key in parser.missing if key not in found]
+    return parser
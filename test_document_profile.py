@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("langchain_groq")
+
+import document_profile
+
+
+class FakeLLM:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def stream(self, prompt):
+        self.calls += 1
+        yield self.responses.pop(0)
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    document_profile._profile_cache.clear()
+    yield
+    document_profile._profile_cache.clear()
+
+
+def test_cut_off_profile_is_not_cached(monkeypatch):
+    llm = FakeLLM(
+        '{"doc_type": "report", "sections": [{"heading": "Bo"',
+        "not json",
+        "not json",
+        '{"doc_type": "report", "sections": [{"heading": "Body"}], "key_points": ["Revenue grew 12%"]}',
+    )
+    monkeypatch.setattr(document_profile, "llm", llm)
+
+    first = document_profile.get_document_profile("doc")
+    assert not first["complete"]
+    assert len(document_profile._profile_cache) == 0
+
+    second = document_profile.get_document_profile("doc")
+    assert second["complete"]
+    assert second["key_points"] == ["Revenue grew 12%"]
+    assert len(document_profile._profile_cache) == 1
+
+
+def test_no_json_returns_empty_incomplete_profile(monkeypatch):
+    monkeypatch.setattr(document_profile, "llm", FakeLLM("Sorry, I cannot help with that."))
+    profile = document_profile.get_document_profile("doc")
+    assert profile["complete"] is False
+    assert profile["sections"] == [] and profile["key_points"] == []
+    assert len(document_profile._profile_cache) == 0
@@ -0,0 +1,155 @@
+import pytest
+
+from structured_output import StreamingJSONParser, SCHEMAS, parse_json, repair_json_fragment, stream_json
+
+
+def feed_in_chunks(text, size, task=None):
+    parser = StreamingJSONParser(SCHEMAS.get(task))
+    events = []
+    for i in range(0, len(text), size):
+        events += parser.feed(text[i:i + size])
+    events += parser.close()
+    return parser, events
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_well_formed_any_chunking(size):
+    text = '{"doc_type": "report", "n": 5, "present_sections": ["Intro", "Body"], ' \
+           '"drafts_for_missing": {"End": "x {y} \\"q\\""}, "ok": true}'
+    parser, events = feed_in_chunks(text, size, "content_suggestion")
+    assert parser.result == {
+        "doc_type": "report",
+        "n": 5,
+        "present_sections": ["Intro", "Body"],
+        "drafts_for_missing": {"End": 'x {y} "q"'},
+        "ok": True,
+    }
+    assert parser.failed == []
+    assert not parser.truncated
+    assert parser.missing == ["expected_sections", "missing_sections", "expanded_bullets"]
+    assert ("item", "present_sections", "Intro") in events
+
+
+def test_fenced_with_prose():
+    text = 'Sure, here it is:\n```json\n{"sections": [{"heading": "A"}]}\n```\nLet me know {if} needed.'
+    assert parse_json(text, "outline") == {"sections": [{"heading": "A"}]}
+
+
+def test_no_json():
+    assert parse_json("no json here") is None
+
+
+def test_truncated_keeps_complete_sections_and_repairs_last():
+    text = '{"sections": [{"heading": "A", "subheadings": []}, {"heading": "B", "subheadings": [{"bullets": ["x'
+    parser, _ = feed_in_chunks(text, 8, "outline")
+    assert parser.result == {
+        "sections": [
+            {"heading": "A", "subheadings": []},
+            {"heading": "B", "subheadings": [{"bullets": ["x"]}]},
+        ]
+    }
+    assert parser.truncated
+    assert parser.cut_off == ("sections", 1, '{"heading": "B", "subheadings": [{"bullets": ["x')
+
+
+def test_truncated_scalar_field_is_flagged():
+    parser, _ = feed_in_chunks('{"doc_type": "rep', 4)
+    assert parser.result == {"doc_type": "rep"}
+    assert parser.truncated
+    assert parser.cut_off == ("doc_type", None, '"rep')
+
+
+def test_missing_required_keys():
+    parser, _ = feed_in_chunks('{"doc_type": "report", "sections": []}', 100, "profile")
+    assert parser.failed == []
+    assert parser.missing == ["key_points"]
+
+
+def test_mismatched_bracket_only_affects_its_fragment():
+    text = '{"sections": [{"heading": "A", "x": [1,2}, {"heading": "B"}]}'
+    result = parse_json(text, "outline")
+    assert result["sections"][-1] == {"heading": "B"}
+    assert result["sections"][0] == {"heading": "A", "x": [1, 2]}
+
+
+def test_stray_closer_is_ignored():
+    text = '{"sections": [{"heading": "A"}]], "n": 1}'
+    assert parse_json(text, "outline") == {"sections": [{"heading": "A"}], "n": 1}
+
+
+def test_invalid_item_is_recorded_not_kept():
+    parser, _ = feed_in_chunks('{"sections": [{"heading": 3}, {"heading": "ok"}]}', 5, "outline")
+    assert parser.result == {"sections": [{"heading": "ok"}]}
+    assert parser.failed == [("sections", 0, '{"heading": 3}')]
+
+
+def test_repair_json_fragment():
+    assert repair_json_fragment('{"a": [1, 2,') == {"a": [1, 2]}
+    assert repair_json_fragment('{"a": "unterminated') == {"a": "unterminated"}
+    assert repair_json_fragment('[1]]') == [1]
+
+
+class FakeLLM:
+    def __init__(self, stream_text, *retry_texts):
+        self.stream_text = stream_text
+        self.retry_texts = list(retry_texts)
+        self.prompts = []
+
+    def stream(self, prompt):
+        for i in range(0, len(self.stream_text), 4):
+            yield self.stream_text[i:i + 4]
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return self.retry_texts.pop(0)
+
+
+def test_stream_json_retries_only_failed_fragment():
+    llm = FakeLLM('{"sections": [{"heading": "A"}, {"heading": 1}]}', '{"heading": "fixed"}')
+    seen = []
+    parser = stream_json(llm, "prompt", task="outline", on_item=lambda key, value: seen.append(value))
+    assert parser.result == {"sections": [{"heading": "A"}, {"heading": "fixed"}]}
+    assert parser.failed == []
+    assert seen == [{"heading": "A"}, {"heading": "fixed"}]
+    assert len(llm.prompts) == 1 and '{"heading": 1}' in llm.prompts[0]
+
+
+def test_stream_json_retried_item_keeps_its_position():
+    llm = FakeLLM(
+        '{"sections": [{"heading": "Intro"}, {"heading": 2}, {"heading": 3}, {"heading": "Conclusion"}]}',
+        '{"heading": "Methods"}',
+        "still not json",
+    )
+    parser = stream_json(llm, "prompt", task="outline")
+    assert [s["heading"] for s in parser.result["sections"]] == ["Intro", "Methods", "Conclusion"]
+    assert parser.failed == [("sections", 2, '{"heading": 3}')]
+
+
+def test_stream_json_retries_cut_off_value_in_place():
+    llm = FakeLLM('{"sections": [{"heading": "A"}, {"heading": "Bo', '{"heading": "Body"}')
+    parser = stream_json(llm, "prompt", task="outline")
+    assert parser.truncated
+    assert parser.result == {"sections": [{"heading": "A"}, {"heading": "Body"}]}
+
+
+def test_stream_json_asks_only_for_missing_keys():
+    llm = FakeLLM('{"doc_type": "report", "sections": [{"heading": "A"}]}', '{"key_points": ["k"]}')
+    parser = stream_json(llm, "prompt", task="profile")
+    assert parser.result["key_points"] == ["k"]
+    assert parser.missing == []
+    assert "['key_points']" in llm.prompts[0]
+
+
+def test_cut_off_profile_is_not_complete():
+    llm = FakeLLM(
+        '{"doc_type": "report", "sections": [{"heading": "Intro"}], "key_points": ["Revenue grew 12',
+        '"Revenue grew 12%"',
+    )
+    parser = stream_json(llm, "prompt", task="profile")
+    assert parser.truncated
+    assert not parser.complete
+
+
+def test_closed_profile_is_complete():
+    llm = FakeLLM('{"doc_type": "report", "sections": [{"heading": "Intro"}], "key_points": ["k"]}')
+    assert stream_json(llm, "prompt", task="profile").complete